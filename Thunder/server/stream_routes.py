@@ -23,7 +23,7 @@ from cachetools import LRUCache
 from Thunder import StartTime, __version__
 from Thunder.bot import multi_clients, StreamBot, work_loads
 from Thunder.server.exceptions import FileNotFound, InvalidHash
-from Thunder.utils.custom_dl import ByteStreamer
+from Thunder.utils.custom_dl import CHUNK_SIZE, ByteStreamer
 from Thunder.utils.logger import logger
 from Thunder.utils.render_template import render_page
 from Thunder.utils.time_format import get_readable_time
@@ -355,8 +355,8 @@ async def media_streamer(
             headers={"Content-Range": f"bytes */{file_size}"}
         )
 
-    # Optimize chunk size for streaming
-    chunk_size = 1 * 1024 * 1024  # 1 MB
+    # Use the largest aligned chunk Telegram serves per request
+    chunk_size = CHUNK_SIZE  # 1 MB
 
     # Calculate offsets and cuts for the requested range
     offset = from_bytes - (from_bytes % chunk_size)
@@ -1,11 +1,24 @@
 # Thunder/utils/custom_dl.py
 
 import math
+import time
+import random
+import logging
 import asyncio
-from typing import Dict, Union
+import weakref
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple, Union
+from cachetools import TTLCache
 from pyrogram import Client, utils, raw
+from pyrogram.raw.core import Long
 from pyrogram.session import Session, Auth
-from pyrogram.errors import AuthBytesInvalid, RPCError, FloodWait
+from pyrogram.errors import (
+    AuthBytesInvalid,
+    FloodWait,
+    InternalServerError,
+    RPCError,
+    ServiceUnavailable,
+)
 from pyrogram.file_id import FileId, FileType, ThumbnailSource
 from Thunder.vars import Var
 from Thunder.bot import work_loads
@@ -13,17 +26,190 @@ from Thunder.server.exceptions import FileNotFound
 from .file_properties import get_file_ids
 from Thunder.utils.logger import logger
 
+FileLocation = Union[
+    raw.types.InputPhotoFileLocation,
+    raw.types.InputDocumentFileLocation,
+    raw.types.InputPeerPhotoFileLocation,
+]
+
+# Largest GetFile limit Telegram accepts; offsets aligned to it need no server-side splitting
+CHUNK_SIZE = 1024 * 1024
+
+# Errors from Telegram's side or the connection that are worth retrying
+TRANSIENT_ERRORS = (InternalServerError, ServiceUnavailable, asyncio.TimeoutError, OSError)
+MAX_TRANSIENT_RETRIES = 3
+
+# Total seconds a media session authorization may spend waiting between retries
+AUTH_RETRY_DEADLINE = 30
+# Total seconds a stream may spend sleeping on FloodWaits before it fails
+STREAM_FLOODWAIT_BUDGET = 120
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff capped at 30 seconds, with jitter so retries from
+    different tasks do not line up.
+
+    Args:
+        attempt (int): The zero-based attempt number.
+
+    Returns:
+        float: The number of seconds to sleep.
+    """
+    return min(30, 2 ** attempt) * (0.5 + random.random())
+
+
+def within_deadline(delay: float, deadline: float) -> bool:
+    """
+    Check whether sleeping for `delay` seconds still ends before `deadline`.
+
+    Args:
+        delay (float): The number of seconds to sleep.
+        deadline (float): The deadline as a `time.monotonic()` timestamp.
+
+    Returns:
+        bool: True if the sleep fits within the deadline.
+    """
+    return time.monotonic() + delay <= deadline
+
+
+def align_range(
+    offset: int,
+    first_part_cut: int,
+    last_part_cut: int,
+    part_count: int,
+    chunk_size: int,
+) -> Tuple[int, int, int, int]:
+    """
+    Re-express a chunked byte range in terms of `CHUNK_SIZE`-aligned chunks.
+
+    Args:
+        offset (int): The offset of the first chunk.
+        first_part_cut (int): The number of bytes to cut from the first chunk.
+        last_part_cut (int): The number of bytes to keep from the last chunk.
+        part_count (int): The total number of parts.
+        chunk_size (int): The chunk size the range was computed with.
+
+    Returns:
+        Tuple[int, int, int, int]: The aligned offset, first_part_cut,
+        last_part_cut and part_count.
+    """
+    from_bytes = offset + first_part_cut
+    until_bytes = offset + (part_count - 1) * chunk_size + last_part_cut - 1
+    offset = from_bytes - (from_bytes % CHUNK_SIZE)
+    return (
+        offset,
+        from_bytes - offset,
+        (until_bytes % CHUNK_SIZE) + 1,
+        ((until_bytes - offset) // CHUNK_SIZE) + 1,
+    )
+
+
+class PreparedGetFile(raw.functions.upload.GetFile):
+    """
+    An upload.GetFile request whose serialized form is built from a cached
+    prefix and suffix, so the location is serialized once per stream rather
+    than once per chunk. Only the 8-byte offset is written per request.
+    """
+
+    # No __slots__ here: TLObject's repr, str and eq read self.__slots__, which
+    # must stay GetFile's so logged requests show location, offset and limit
+
+    def __init__(self, prefix: bytes, suffix: bytes, location: FileLocation, offset: int, limit: int):
+        super().__init__(location=location, offset=offset, limit=limit)
+        self._prefix = prefix
+        self._suffix = suffix
+
+    @staticmethod
+    def split(location: FileLocation, limit: int) -> Tuple[bytes, bytes]:
+        """
+        Serialize a GetFile request and split it around its offset field.
+
+        The request ends with `offset:long limit:int`, so everything before the
+        last 12 bytes is the prefix and the last 4 bytes are the limit.
+
+        Args:
+            location (FileLocation): The location object of the file.
+            limit (int): The chunk size requested.
+
+        Returns:
+            Tuple[bytes, bytes]: The bytes before and after the offset.
+        """
+        data = raw.functions.upload.GetFile(location=location, offset=0, limit=limit).write()
+        return data[:-12], data[-4:]
+
+    def write(self, *args) -> bytes:
+        return self._prefix + Long(self.offset) + self._suffix
+
+
+def _build_chat_photo_location(file_id: FileId) -> raw.types.InputPeerPhotoFileLocation:
+    """Build the location of a user, chat or channel profile photo."""
+    if file_id.chat_id > 0:
+        peer = raw.types.InputPeerUser(
+            user_id=file_id.chat_id, access_hash=file_id.chat_access_hash
+        )
+    elif file_id.chat_access_hash == 0:
+        peer = raw.types.InputPeerChat(chat_id=-file_id.chat_id)
+    else:
+        peer = raw.types.InputPeerChannel(
+            channel_id=utils.get_channel_id(file_id.chat_id),
+            access_hash=file_id.chat_access_hash,
+        )
+    return raw.types.InputPeerPhotoFileLocation(
+        peer=peer,
+        volume_id=file_id.volume_id,
+        local_id=file_id.local_id,
+        big=file_id.thumbnail_source == ThumbnailSource.CHAT_PHOTO_BIG,
+    )
+
+
+def _build_photo_location(file_id: FileId) -> raw.types.InputPhotoFileLocation:
+    """Build the location of a photo."""
+    return raw.types.InputPhotoFileLocation(
+        id=file_id.media_id,
+        access_hash=file_id.access_hash,
+        file_reference=file_id.file_reference,
+        thumb_size=file_id.thumbnail_size,
+    )
+
+
+def _build_document_location(file_id: FileId) -> raw.types.InputDocumentFileLocation:
+    """Build the location of a document, which covers every other file type."""
+    return raw.types.InputDocumentFileLocation(
+        id=file_id.media_id,
+        access_hash=file_id.access_hash,
+        file_reference=file_id.file_reference,
+        thumb_size=file_id.thumbnail_size,
+    )
+
+
+# Location builders by file type; anything not listed is a document
+_LOCATION_BUILDERS: Dict[FileType, Callable[[FileId], FileLocation]] = {
+    FileType.CHAT_PHOTO: _build_chat_photo_location,
+    FileType.PHOTO: _build_photo_location,
+}
+
+
 class ByteStreamer:
     """
     A custom class that handles streaming of media files from Telegram servers.
 
     Attributes:
+        clean_timer (int): Interval in seconds to clean the cache; also the entry lifetime.
         client (Client): The Pyrogram client instance.
-        clean_timer (int): Interval in seconds to clean the cache.
-        cached_file_ids (Dict[int, FileId]): A cache for file properties.
-        cache_lock (asyncio.Lock): An asyncio lock to ensure thread-safe access to the cache.
+        cached_file_ids (TTLCache): An LRU cache of file properties keyed by
+            (chat ID, message ID), whose entries expire after `clean_timer` seconds.
+        _media_sessions (Dict[int, Session]): The client's media sessions, keyed by DC ID.
+        _dc_locks (Dict[int, asyncio.Lock]): Per-DC locks so each media session is built once.
+        _prewarm_task (Optional[asyncio.Task]): The task opening `Var.PREWARM_DC_IDS` sessions.
+        _instances (weakref.WeakSet): All live instances, swept by the shared cache cleaner.
+        _sweeper_task (Optional[asyncio.Task]): The shared cache cleaner task.
     """
 
+    clean_timer = 30 * 60  # Cache clean interval in seconds (30 minutes)
+    _instances: "weakref.WeakSet[ByteStreamer]" = weakref.WeakSet()
+    _sweeper_task: Optional[asyncio.Task] = None
+
     def __init__(self, client: Client):
         """
         Initialize the ByteStreamer with a Pyrogram client.
@@ -32,18 +218,37 @@ class ByteStreamer:
             client (Client): The Pyrogram client instance.
         """
         self.client = client
-        self.clean_timer = 30 * 60  # Cache clean interval in seconds (30 minutes)
-        self.cached_file_ids: Dict[int, FileId] = {}
-        self.cache_lock = asyncio.Lock()
-        asyncio.create_task(self.clean_cache())
+        self.cached_file_ids: TTLCache = TTLCache(
+            maxsize=Var.FILE_CACHE_SIZE, ttl=self.clean_timer
+        )
+        self._inflight: Dict[Tuple[int, int], asyncio.Task] = {}
+        self._inflight_lock = asyncio.Lock()
+        self._media_sessions: Dict[int, Session] = client.media_sessions
+        self._dc_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        ByteStreamer._instances.add(self)
+        if ByteStreamer._sweeper_task is None or ByteStreamer._sweeper_task.done():
+            ByteStreamer._sweeper_task = asyncio.create_task(ByteStreamer._sweep_caches())
+        self._prewarm_task: Optional[asyncio.Task] = None
+        if Var.PREWARM_DC_IDS:
+            self._prewarm_task = asyncio.create_task(self.warm_media_sessions(Var.PREWARM_DC_IDS))
         logger.info("ByteStreamer initialized with client.")
 
-    async def get_file_properties(self, message_id: int) -> FileId:
+    async def get_file_properties(
+        self, message_id: int, chat_id: int = Var.BIN_CHANNEL
+    ) -> FileId:
         """
         Get file properties from cache or generate if not available.
 
+        Cache hits are served without taking any lock. Concurrent misses for the
+        same message share a single lookup task, which every caller awaits
+        through `asyncio.shield` so one caller being cancelled does not abort
+        it for the others. The file's location object is built once and kept
+        on the cached FileId as `location`, so it is released together with
+        the cache entry.
+
         Args:
             message_id (int): The message ID of the file.
+            chat_id (int): The chat holding the message. Defaults to `Var.BIN_CHANNEL`.
 
         Returns:
             FileId: The file properties object.
@@ -51,25 +256,64 @@ class ByteStreamer:
         Raises:
             FileNotFound: If the file is not found in the channel.
         """
-        logger.debug(f"Fetching file properties for message ID {message_id}.")
-        async with self.cache_lock:
-            file_id = self.cached_file_ids.get(message_id)
-        
-        if not file_id:
-            logger.debug(f"File ID for message {message_id} not found in cache, generating...")
-            file_id = await self.generate_file_properties(message_id)
-            async with self.cache_lock:
-                self.cached_file_ids[message_id] = file_id
-            logger.info(f"Cached new file properties for message ID {message_id}.")
-        
+        logger.debug("Fetching file properties for message ID %s.", message_id)
+        key = (chat_id, message_id)
+        file_id = self.cached_file_ids.get(key)
+        if file_id:
+            return file_id
+
+        async with self._inflight_lock:
+            file_id = self.cached_file_ids.get(key)
+            if file_id:
+                return file_id
+            task = self._inflight.get(key)
+            if task is None:
+                logger.debug("File ID for message %s not found in cache, generating...", message_id)
+                task = asyncio.create_task(self._load_file_properties(key))
+                task.add_done_callback(self._inflight_done)
+                self._inflight[key] = task
+            else:
+                logger.debug("Waiting for in-flight lookup of message ID %s.", message_id)
+
+        return await asyncio.shield(task)
+
+    async def _load_file_properties(self, key: Tuple[int, int]) -> FileId:
+        """
+        Generate file properties, attach the location and store them in the cache.
+
+        Args:
+            key (Tuple[int, int]): The (chat ID, message ID) of the file.
+
+        Returns:
+            FileId: The file properties object.
+        """
+        chat_id, message_id = key
+        try:
+            file_id = await self.generate_file_properties(message_id, chat_id)
+            file_id.location = self.get_location(file_id)
+            self.cached_file_ids[key] = file_id
+        finally:
+            self._inflight.pop(key, None)
+        logger.info("Cached new file properties for message ID %s.", message_id)
         return file_id
 
-    async def generate_file_properties(self, message_id: int) -> FileId:
+    @staticmethod
+    def _inflight_done(task: asyncio.Task) -> None:
+        """Mark a lookup's exception as retrieved in case every caller was cancelled."""
+        if not task.cancelled():
+            task.exception()
+
+    async def generate_file_properties(
+        self, message_id: int, chat_id: int = Var.BIN_CHANNEL
+    ) -> FileId:
         """
         Generate file properties for a given message ID.
 
+        This does not touch the cache; `_load_file_properties` is its only writer.
+
         Args:
             message_id (int): The message ID of the file.
+            chat_id (int): The chat holding the message. Defaults to `Var.BIN_CHANNEL`.
 
         Returns:
             FileId: The file properties object.
@@ -78,21 +322,18 @@ class ByteStreamer:
             FileNotFound: If the file is not found.
         """
         logger.debug(f"Generating file properties for message ID {message_id}.")
-        file_id = await get_file_ids(self.client, Var.BIN_CHANNEL, message_id)
+        file_id = await get_file_ids(self.client, chat_id, message_id)
         
         if not file_id:
             logger.warning(f"Message ID {message_id} not found in the channel.")
             raise FileNotFound(f"File with message ID {message_id} not found.")
-        
-        async with self.cache_lock:
-            self.cached_file_ids[message_id] = file_id
-        logger.info(f"Generated and cached file properties for message ID {message_id}.")
-        
+
+        logger.info(f"Generated file properties for message ID {message_id}.")
         return file_id
 
     async def generate_media_session(self, file_id: FileId) -> Session:
         """
-        Generate the media session for the DC that contains the media file.
+        Get the media session for the DC that contains the media file.
 
         Args:
             file_id (FileId): The file properties object.
@@ -103,75 +344,152 @@ class ByteStreamer:
         Raises:
             AuthBytesInvalid: If authentication fails after retries.
         """
-        logger.debug(f"Generating media session for DC {file_id.dc_id}.")
+        return await self.get_media_session(file_id.dc_id)
+
+    async def get_media_session(self, dc_id: int) -> Session:
+        """
+        Get the pooled media session for a DC, creating it on first use.
+
+        Only one task builds the session for a given DC; concurrent callers wait
+        on the DC lock and reuse the session it stored.
+
+        Args:
+            dc_id (int): The data center ID.
+
+        Returns:
+            Session: The media session object.
+
+        Raises:
+            AuthBytesInvalid: If authentication fails after retries.
+        """
+        media_session = self._media_sessions.get(dc_id)
+        if media_session is not None:
+            logger.debug("Using cached media session for DC %s.", dc_id)
+            return media_session
+
+        async with self._dc_locks[dc_id]:
+            media_session = self._media_sessions.get(dc_id)
+            if media_session is None:
+                media_session = await self._create_media_session(dc_id)
+                self._media_sessions[dc_id] = media_session
+
+        return media_session
+
+    async def warm_media_sessions(self, dc_ids: Iterable[int]) -> None:
+        """
+        Open media sessions ahead of time so the first stream from each DC
+        skips the authorization round-trips.
+
+        Args:
+            dc_ids (Iterable[int]): The data center IDs to open sessions for.
+        """
+        for dc_id in dc_ids:
+            try:
+                await self.get_media_session(dc_id)
+                logger.info(f"Pre-warmed media session for DC {dc_id}.")
+            except Exception as e:
+                logger.warning(f"Failed to pre-warm media session for DC {dc_id}: {e}")
+
+    async def _create_media_session(self, dc_id: int) -> Session:
+        """
+        Build, start and authorize a new media session for a DC.
+
+        Args:
+            dc_id (int): The data center ID.
+
+        Returns:
+            Session: The started media session.
+
+        Raises:
+            AuthBytesInvalid: If authentication fails after retries.
+            RPCError: If Telegram rejects the authorization with a non-transient error,
+                or waiting for the next retry would run past `AUTH_RETRY_DEADLINE`.
+        """
+        deadline = time.monotonic() + AUTH_RETRY_DEADLINE
         client = self.client
-        media_session = client.media_sessions.get(file_id.dc_id)
-
-        if media_session is None:
-            client_dc_id = await client.storage.dc_id()
-            test_mode = await client.storage.test_mode()
-
-            if file_id.dc_id != client_dc_id:
-                logger.info(f"Creating new media session for DC {file_id.dc_id}.")
-                auth = Auth(client, file_id.dc_id, test_mode)
-                auth_key = await auth.create()
-                media_session = Session(
-                    client,
-                    file_id.dc_id,
-                    auth_key,
-                    test_mode,
-                    is_media=True,
+        client_dc_id = await client.storage.dc_id()
+        test_mode = await client.storage.test_mode()
+
+        if dc_id == client_dc_id:
+            logger.info(f"Using existing auth key for DC {dc_id}.")
+            media_session = Session(
+                client,
+                dc_id,
+                await client.storage.auth_key(),
+                test_mode,
+                is_media=True,
+            )
+            await media_session.start()
+            return media_session
+
+        logger.info(f"Creating new media session for DC {dc_id}.")
+        auth = Auth(client, dc_id, test_mode)
+        auth_key = await auth.create()
+        media_session = Session(
+            client,
+            dc_id,
+            auth_key,
+            test_mode,
+            is_media=True,
+        )
+        await media_session.start()
+
+        transient_retries = 0
+        last_error: Optional[Exception] = None
+        for attempt in range(6):
+            try:
+                exported_auth = await client.invoke(
+                    raw.functions.auth.ExportAuthorization(dc_id=dc_id)
                 )
-                await media_session.start()
-
-                for attempt in range(6):
-                    try:
-                        exported_auth = await client.invoke(
-                            raw.functions.auth.ExportAuthorization(dc_id=file_id.dc_id)
-                        )
-                        await media_session.send(
-                            raw.functions.auth.ImportAuthorization(
-                                id=exported_auth.id, bytes=exported_auth.bytes
-                            )
-                        )
-                        logger.info(f"Authorization imported for DC {file_id.dc_id} on attempt {attempt + 1}.")
-                        break
-                    except AuthBytesInvalid:
-                        logger.warning(f"AuthBytesInvalid on attempt {attempt + 1} for DC {file_id.dc_id}.")
-                        if attempt == 5:
-                            await media_session.stop()
-                            logger.error(f"Failed after 6 attempts for DC {file_id.dc_id}.")
-                            raise AuthBytesInvalid(f"Failed after 6 attempts for DC {file_id.dc_id}")
-                        await asyncio.sleep(2 ** attempt)  # Exponential backoff
-                    except FloodWait as e:
-                        logger.warning(f"FloodWait encountered: sleeping for {e.value} seconds.")
-                        await asyncio.sleep(e.value + 1)
-                    except RPCError as e:
-                        logger.error(f"RPCError during auth for DC {file_id.dc_id}: {e}")
-                        await asyncio.sleep(1)
-            else:
-                logger.info(f"Using existing auth key for DC {file_id.dc_id}.")
-                media_session = Session(
-                    client,
-                    file_id.dc_id,
-                    await client.storage.auth_key(),
-                    test_mode,
-                    is_media=True,
+                await media_session.send(
+                    raw.functions.auth.ImportAuthorization(
+                        id=exported_auth.id, bytes=exported_auth.bytes
+                    )
                 )
-                await media_session.start()
-
-            client.media_sessions[file_id.dc_id] = media_session
+                logger.info(f"Authorization imported for DC {dc_id} on attempt {attempt + 1}.")
+                break
+            except AuthBytesInvalid:
+                logger.warning(f"AuthBytesInvalid on attempt {attempt + 1} for DC {dc_id}.")
+                delay = backoff_delay(attempt)
+                if attempt == 5 or not within_deadline(delay, deadline):
+                    await media_session.stop()
+                    logger.error(f"Failed after {attempt + 1} attempts for DC {dc_id}.")
+                    raise AuthBytesInvalid(f"Failed after {attempt + 1} attempts for DC {dc_id}")
+                await asyncio.sleep(delay)
+            except FloodWait as e:
+                last_error = e
+                delay = e.value + 1
+                if not within_deadline(delay, deadline):
+                    await media_session.stop()
+                    logger.error(f"FloodWait of {e.value} seconds exceeds the auth deadline for DC {dc_id}.")
+                    raise
+                logger.warning(f"FloodWait encountered: sleeping for {e.value} seconds.")
+                await asyncio.sleep(delay)
+            except TRANSIENT_ERRORS as e:
+                last_error = e
+                transient_retries += 1
+                delay = backoff_delay(transient_retries - 1)
+                if transient_retries > MAX_TRANSIENT_RETRIES or not within_deadline(delay, deadline):
+                    await media_session.stop()
+                    logger.error(f"Giving up on auth for DC {dc_id} after {transient_retries} transient errors: {e}")
+                    raise
+                logger.warning(f"Transient error during auth for DC {dc_id}, retrying: {e}")
+                await asyncio.sleep(delay)
+            except RPCError as e:
+                await media_session.stop()
+                logger.error(f"RPCError during auth for DC {dc_id}: {e}")
+                raise
         else:
-            logger.debug(f"Using cached media session for DC {file_id.dc_id}.")
+            # AuthBytesInvalid raises from its own handler on the last attempt, so
+            # only FloodWait or transient errors can use up every attempt
+            await media_session.stop()
+            logger.error(f"Could not import authorization for DC {dc_id} after 6 attempts: {last_error!r}")
+            raise last_error
 
         return media_session
 
     @staticmethod
-    async def get_location(file_id: FileId) -> Union[
-        raw.types.InputPhotoFileLocation,
-        raw.types.InputDocumentFileLocation,
-        raw.types.InputPeerPhotoFileLocation,
-    ]:
+    def get_location(file_id: FileId) -> FileLocation:
         """
         Get the appropriate location object for the file type.
 
@@ -181,44 +499,7 @@ class ByteStreamer:
         Returns:
             Union[InputPhotoFileLocation, InputDocumentFileLocation, InputPeerPhotoFileLocation]: The location object.
         """
-        logger.debug(f"Determining location for file type {file_id.file_type}.")
-        file_type = file_id.file_type
-
-        if file_type == FileType.CHAT_PHOTO:
-            if file_id.chat_id > 0:
-                peer = raw.types.InputPeerUser(
-                    user_id=file_id.chat_id, access_hash=file_id.chat_access_hash
-                )
-            else:
-                if file_id.chat_access_hash == 0:
-                    peer = raw.types.InputPeerChat(chat_id=-file_id.chat_id)
-                else:
-                    peer = raw.types.InputPeerChannel(
-                        channel_id=utils.get_channel_id(file_id.chat_id),
-                        access_hash=file_id.chat_access_hash,
-                    )
-            location = raw.types.InputPeerPhotoFileLocation(
-                peer=peer,
-                volume_id=file_id.volume_id,
-                local_id=file_id.local_id,
-                big=file_id.thumbnail_source == ThumbnailSource.CHAT_PHOTO_BIG,
-            )
-        elif file_type == FileType.PHOTO:
-            location = raw.types.InputPhotoFileLocation(
-                id=file_id.media_id,
-                access_hash=file_id.access_hash,
-                file_reference=file_id.file_reference,
-                thumb_size=file_id.thumbnail_size,
-            )
-        else:
-            location = raw.types.InputDocumentFileLocation(
-                id=file_id.media_id,
-                access_hash=file_id.access_hash,
-                file_reference=file_id.file_reference,
-                thumb_size=file_id.thumbnail_size,
-            )
-        logger.debug(f"Location determined for file ID {file_id.media_id}.")
-        return location
+        return _LOCATION_BUILDERS.get(file_id.file_type, _build_document_location)(file_id)
 
     async def yield_file(
         self,
@@ -233,6 +514,13 @@ class ByteStreamer:
         """
         Yield chunks of a file, handling cuts at the first and last parts.
 
+        Chunks are always requested as `CHUNK_SIZE`-aligned blocks; a range
+        computed with another chunk size is converted first.
+
+        Up to `Var.STREAM_PREFETCH` chunks are requested ahead of the one being
+        yielded, so the Telegram round-trips overlap instead of running back to
+        back. Chunks are still yielded strictly in order.
+
         Args:
             file_id (FileId): The file properties object.
             index (int): The client index.
@@ -245,62 +533,147 @@ class ByteStreamer:
         Yields:
             bytes: The next chunk of data.
         """
-        client = self.client
+        if chunk_size != CHUNK_SIZE:
+            offset, first_part_cut, last_part_cut, part_count = align_range(
+                offset, first_part_cut, last_part_cut, part_count, chunk_size
+            )
+            chunk_size = CHUNK_SIZE
+
         work_loads[index] += 1
-        logger.debug(f"Starting to yield file with client index {index}.")
+        log_debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if log_debug_enabled:
+            logger.debug("Starting to yield file with client index %s.", index)
 
-        media_session = await self.generate_media_session(file_id)
         current_part = 1
-        location = await self.get_location(file_id)
+        pending: Deque[asyncio.Task] = deque()
+        # FloodWait sleep shared by every chunk of this stream, measured against
+        # STREAM_FLOODWAIT_BUDGET so long but healthy streams are not failed
+        flood_slept = 0
 
         try:
-            while current_part <= part_count:
-                try:
-                    response = await media_session.send(
-                        raw.functions.upload.GetFile(
-                            location=location, offset=offset, limit=chunk_size
-                        )
-                    )
-                    if not isinstance(response, raw.types.upload.File):
+            media_session = await self.generate_media_session(file_id)
+            # Compare with None: a TLObject's truthiness serializes it via __len__
+            location = getattr(file_id, "location", None)
+            if location is None:
+                location = self.get_location(file_id)
+
+            # Bind the per-chunk lookups once instead of on every request
+            send = media_session.send
+            GetFile = PreparedGetFile
+            prefix, suffix = PreparedGetFile.split(location, chunk_size)
+            UploadFile = raw.types.upload.File
+            create_task = asyncio.create_task
+
+            async def fetch_chunk(chunk_offset: int) -> Optional[bytes]:
+                """Fetch one chunk, waiting out FloodWaits within the stream's budget."""
+                nonlocal flood_slept
+                while True:
+                    try:
+                        # Shielded so cancelling this fetch only abandons the wait:
+                        # pyrogram's send still receives the reply and pops it from
+                        # the session's pending results instead of stranding it there
+                        response = await asyncio.shield(send(
+                            GetFile(prefix, suffix, location, chunk_offset, chunk_size)
+                        ))
+                    except FloodWait as e:
+                        delay = e.value + 1
+                        if flood_slept + delay > STREAM_FLOODWAIT_BUDGET:
+                            logger.error(f"FloodWait of {e.value} seconds exceeds the stream's FloodWait budget.")
+                            raise
+                        flood_slept += delay
+                        logger.warning(f"FloodWait encountered: sleeping for {e.value} seconds.")
+                        await asyncio.sleep(delay)
+                        continue
+
+                    if not isinstance(response, UploadFile):
                         logger.warning("Unexpected response type while fetching file.")
-                        break
+                        return None
+                    return response.bytes
 
-                    chunk = response.bytes
-                    if not chunk:
-                        logger.debug("Received empty chunk, ending stream.")
-                        break
+            # A range inside one chunk (typical of player seeks and probes)
+            # needs a single request and no prefetching
+            if part_count == 1:
+                try:
+                    chunk = await fetch_chunk(offset)
+                except (RPCError, asyncio.TimeoutError) as e:
+                    logger.error(f"Error while fetching file part: {e}")
+                    raise
+                if chunk:
+                    yield chunk[first_part_cut:last_part_cut]
+                    current_part += 1
+                return
 
-                    if part_count == 1:
-                        yield chunk[first_part_cut:last_part_cut]
-                    elif current_part == 1:
-                        yield chunk[first_part_cut:]
-                    elif current_part == part_count:
-                        yield chunk[:last_part_cut]
-                    else:
-                        yield chunk
+            prefetch = max(1, Var.STREAM_PREFETCH)
+            next_offset = offset
+            requested_parts = 0
 
-                    current_part += 1
-                    offset += chunk_size
+            # (start, stop) slice bounds for the first, middle and last chunk
+            first_slice = (first_part_cut, None)
+            middle_slice = (None, None)
+            last_slice = (None, last_part_cut)
 
-                    if current_part > part_count:
-                        break
+            while current_part <= part_count:
+                while len(pending) < prefetch and requested_parts < part_count:
+                    pending.append(create_task(fetch_chunk(next_offset)))
+                    next_offset += chunk_size
+                    requested_parts += 1
 
-                except FloodWait as e:
-                    logger.warning(f"FloodWait encountered: sleeping for {e.value} seconds.")
-                    await asyncio.sleep(e.value + 1)
+                try:
+                    chunk = await pending.popleft()
                 except (RPCError, asyncio.TimeoutError) as e:
                     logger.error(f"Error while fetching file part: {e}")
                     raise
+
+                if not chunk:
+                    if log_debug_enabled:
+                        logger.debug("Received empty chunk, ending stream.")
+                    break
+
+                bounds = (
+                    first_slice if current_part == 1
+                    else last_slice if current_part == part_count
+                    else middle_slice
+                )
+                yield chunk[bounds[0]:bounds[1]]
+
+                current_part += 1
         finally:
-            logger.debug(f"Finished yielding file, processed {current_part - 1} parts.")
-            work_loads[index] -= 1
+            try:
+                # Cancel chunks requested ahead and wait for them to unwind. This
+                # stops their FloodWait sleeps and retries; a GetFile already sent
+                # is shielded and still completes inside pyrogram's session
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+                if log_debug_enabled:
+                    logger.debug("Finished yielding file, processed %d parts.", current_part - 1)
+            finally:
+                work_loads[index] -= 1
+
+    def clean_cache(self) -> None:
+        """
+        Evict cached file IDs older than `clean_timer`.
+
+        TTLCache only expires entries when it is written to, so this releases
+        the file IDs of a client that has stopped receiving requests. Entries
+        that are still fresh are kept. Nothing here awaits, so readers never
+        observe a half-swept cache and no lock is needed.
+        """
+        size = len(self.cached_file_ids)
+        self.cached_file_ids.expire()
+        logger.debug("Cache cleaned, evicted %d entries.", size - len(self.cached_file_ids))
 
-    async def clean_cache(self) -> None:
+    @classmethod
+    async def _sweep_caches(cls) -> None:
         """
-        Periodically clean the cache of stored file IDs.
+        Periodically clean the caches of all live instances.
+
+        A single task serves every instance; instances are held weakly so
+        dropping a ByteStreamer does not keep it alive. Each pass runs over a
+        snapshot of the instances without yielding to the event loop.
         """
         while True:
-            await asyncio.sleep(self.clean_timer)
-            async with self.cache_lock:
-                self.cached_file_ids.clear()
-            logger.debug("Cache cleaned.")
+            await asyncio.sleep(cls.clean_timer)
+            for streamer in tuple(cls._instances):
+                streamer.clean_cache()
@@ -78,5 +78,16 @@ class Var:
         int(x) for x in os.getenv('BANNED_CHANNELS', '').split() if x.lstrip('-').isdigit()
     )
 
+    # Telegram DCs to open media sessions for as soon as a streaming client is created
+    PREWARM_DC_IDS: Set[int] = set(
+        int(x) for x in os.getenv('PREWARM_DC_IDS', '').split() if x.isdigit()
+    )
+
+    # Maximum number of file properties cached per streaming client
+    FILE_CACHE_SIZE: int = int(os.getenv('FILE_CACHE_SIZE', '1024'))
+
+    # Number of file chunks requested ahead of the one being streamed
+    STREAM_PREFETCH: int = int(os.getenv('STREAM_PREFETCH', '4'))
+
     # Multi-client support
     MULTI_CLIENT: bool = False